@@ -7,6 +7,7 @@
 '''
 # standard lib imports
 import sys, os
+from functools import partial
 
 # dependency imports
 from PyQt5.QtWidgets import QApplication
@@ -22,11 +23,14 @@ from SCTimeUtility.LeaderBoard.LeaderBoard import LeaderBoard
 from SCTimeUtility.Log.Log import getLog
 from SCTimeUtility.Log.LogWidget import LogWidget
 from SCTimeUtility.System.FileSystem import exportCSV, importCSV
+from SCTimeUtility.System.SessionFile import saveSession, loadSession, sessionFileName
+from SCTimeUtility.System.Journal import Journal
+from SCTimeUtility.Resources import journalDir
 
 
 class App(QApplication):
 
-    def __init__(self):
+    def __init__(self, journalDirectory=journalDir):
         super(App, self).__init__(sys.argv)
         self.mainWindow = None
         self.running = False
@@ -42,6 +46,9 @@ class App(QApplication):
         self.graph = None
         self.logWidget = None
         self.leaderBoard = None
+        self.journal = None
+        # directory the autosave journal is kept in, None to run without one
+        self.journalDirectory = journalDirectory
 
         # Initializing everything
         self.initApplication()
@@ -62,6 +69,7 @@ class App(QApplication):
         self.initVision()
         self.initGraph()
         self.initLeaderBoard()
+        self.initJournal()
 
         # adding and connecting essential components to user interface
         self.addComponents()
@@ -118,6 +126,7 @@ class App(QApplication):
 
     def initVision(self):
         self.vision = Video()
+        self.vision.setCarStorage(self.table.CarStoreList)
         if self.vision is not None:
             getLog().debug('[' + __name__ + '] ' + 'Video module Initialized')
         else:
@@ -151,7 +160,7 @@ class App(QApplication):
     '''
 
     def initGraph(self):
-        self.graph = Graph()
+        self.graph = Graph(self.table.CarStoreList)
         if self.graph is not None:
             getLog().debug('[' + __name__ + '] ' + 'Graph module initialized')
         else:
@@ -174,6 +183,36 @@ class App(QApplication):
         else:
             getLog().debug('[' + __name__ + '] ' + 'LeaderBoard module failed to initialize')
 
+    ''' 
+
+        Function: initJournal(self)
+        Parameters: self
+        Return Value: N/A
+        Purpose: Opens the autosave journal, replaying the last session into the table's CarStorage if the
+                 application wasn't shut down cleanly, and journals every change from then on. After a clean
+                 shutdown a new session is started. A replayed session is compacted straight away so the journal
+                 starts out empty.
+
+    '''
+
+    def initJournal(self):
+        if self.journalDirectory is None:
+            getLog().debug('[' + __name__ + '] ' + 'Journal disabled, the session is not autosaved')
+            return
+        self.journal = Journal(self.journalDirectory, self)
+        try:
+            self.journal.open(self.table.CarStoreList)
+        except (OSError, ValueError) as err:
+            self.logger.error('[' + __name__ + '] ' + 'Journal could not be opened, autosave disabled: ' + str(err))
+            self.journal = None
+            return
+        if self.journal.recordCount > 0:
+            self.journal.compact(self.table.CarStoreList)
+        if self.journal.recovered:
+            self.logger.info('[' + __name__ + '] ' + 'Recovered the session that was not shut down cleanly')
+        self.aboutToQuit.connect(partial(self.journal.close, True))
+        getLog().debug('[' + __name__ + '] ' + 'Journal opened in: ' + self.journalDirectory)
+
     ''' 
 
         Function: addComponents(self)
@@ -218,7 +257,6 @@ class App(QApplication):
         self.mainWindow.actionOpenDir.triggered.connect(self.importDataFromFile)
         self.mainWindow.actionExportData.triggered.connect(self.exportDataToFile)
         self.table.Widget.saveShortcut.activated.connect(self.exportDataToFile)
-        self.table.CarStoreList.dataModified.connect(self.graphUpdate)
 
     ''' 
     
@@ -248,7 +286,10 @@ class App(QApplication):
     def exportDataToFile(self):
         writePath = os.path.join(self.mainWindow.openDirDialog())
         if os.path.exists(writePath):
-            exportCSV(self.table.CarStoreList, writePath)
+            folderPath = exportCSV(self.table.CarStoreList, writePath)
+            saveSession(self.table.CarStoreList, os.path.join(folderPath, sessionFileName))
+            if self.journal is not None:
+                self.journal.compact(self.table.CarStoreList)
             self.logger.debug('[' + __name__ + '] ' + 'Data saved to: ' + writePath)
         else:
             self.logger.debug('[' + __name__ + '] ' + 'Could not save data to: ' + str(writePath))
@@ -258,18 +299,33 @@ class App(QApplication):
         Function: importDataFromFile(self)
         Parameters: self
         Return Value: N/A
-        Purpose: opens a directory chosen by user, then proceeds to read and parse CSVs that have relevant tokens
-                 and data. 
+        Purpose: opens a directory chosen by user, if it holds a session file saved by exportDataToFile the session
+                 is loaded from it, otherwise the car CSVs exportCSV wrote to it are read. Either way the cars are
+                 added after the ones already in the table, in one batch.
 
     '''
 
-    # TODO: Rework so that addcar passes in Table module data
     def importDataFromFile(self):
         readDir = os.path.join(self.mainWindow.openDirDialog())
-        if os.path.exists(readDir):
-            importCSV(readDir)
-        else:
-            pass
+        sessionPath = os.path.join(readDir, sessionFileName)
+        if os.path.isfile(sessionPath):
+            loadSession(sessionPath, self.table.CarStoreList)
+            self.logger.debug('[' + __name__ + '] ' + 'Session loaded from: ' + sessionPath)
+        elif os.path.exists(readDir):
+            try:
+                cars = importCSV(readDir)
+            except (OSError, ValueError, IndexError) as err:
+                self.logger.error('[' + __name__ + '] ' + 'Could not import data from: ' + readDir + ': ' + str(err))
+                return
+            storage = self.table.CarStoreList
+            firstID = storage.getLatestCarID()
+            newCars = []
+            for x in range(0, len(cars)):
+                newCar = storage.newCar(firstID + x, cars[x].CarNum, cars[x].TeamName)
+                newCar.restoreLaps(cars[x].lapList, cars[x].seedValue, cars[x].running)
+                newCars.append(newCar)
+            storage.insertCars(newCars)
+            self.logger.debug('[' + __name__ + '] ' + 'Data imported from: ' + readDir)
 
     ''' 
 
@@ -286,18 +342,6 @@ class App(QApplication):
         else:
             self.logger.debug('[' + __name__ + '] ' + 'Failed to create new session.')
 
-    '''
-        Function: graphUpdate
-        Parameters: self
-        Return Value: N/A
-        Purpose: Binds an update function to pass a copy of carStorage to the graph if the table is ever updated with
-                 new information (based on qt signals emitted by cars).
-    
-    '''
-
-    def graphUpdate(self):
-        self.graph.handleUpdate(self.table.getCarStorage())
-
     '''
         Function: graphUpdate
         Parameters: self
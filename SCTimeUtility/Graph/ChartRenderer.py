@@ -0,0 +1,452 @@
+"""
+
+    Module: ChartRenderer.py
+    Purpose: Draws the Graph module's charts in a worker thread, leaving the Qt GUI thread free for recording laps.
+             A Plot describes its chart as a ChartJob, functions building each series from a snapshot of a car's
+             laps included, and submits it. The worker works the series out, downsamples them to the chart's width,
+             draws the chart off screen with Agg and posts it back as a QImage. Only the newest job of each plot is
+             kept: a job waiting to be drawn is replaced by a newer one, and one being drawn is abandoned at the
+             next step once it has been superseded. Every chart is drawn by this one thread, matplotlib is never
+             used from two at once.
+    Depends On: threading, numpy, matplotlib, PyQt
+
+"""
+
+import threading
+
+import numpy as np
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QImage
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import MaxNLocator
+
+from SCTimeUtility.Log.Log import getLog
+
+# fraction of the data's span added to an axis when it has to grow, so it doesn't have to again for a while
+axisHeadroom = 0.25
+# pixels per inch charts are drawn at
+defaultDpi = 100
+
+'''
+    Function: minMaxDownsample
+    Parameters: x, y, buckets
+    Return Value: (numpy.ndarray, numpy.ndarray)
+    Purpose: Returns the points of a series with its y values split into buckets runs of equal length and only the
+             lowest and highest point of each kept, along with the first and last point, in their original order.
+             Drawn a bucket to a pixel column the line looks the same as with every point. Series of no more than
+             two points a bucket are returned as they are. A run of nothing but NaN stays a gap in the line, a NaN
+             among numbers is dropped.
+'''
+
+
+def minMaxDownsample(x, y, buckets):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    count = len(y)
+    if buckets < 1 or count <= 2 * buckets:
+        return x, y
+    size = -(-count // buckets)
+    buckets = -(-count // size)
+    padded = np.full(buckets * size, np.nan)
+    padded[:count] = y
+    rows = padded.reshape(buckets, size)
+    gaps = np.isnan(rows)
+    offsets = np.arange(0, buckets * size, size)
+    low = offsets + np.where(gaps, np.inf, rows).argmin(axis=1)
+    high = offsets + np.where(gaps, -np.inf, rows).argmax(axis=1)
+    index = np.unique(np.concatenate((low, high, [0, count - 1])))
+    index = index[index < count]
+    return x[index], y[index]
+
+
+'''
+    Function: sampleSeries
+    Parameters: x, y, left, right, width
+    Return Value: (numpy.ndarray, numpy.ndarray)
+    Purpose: Returns the points of a series with increasing x between left and right, and one either side of them,
+             downsampled to width pixels.
+'''
+
+
+def sampleSeries(x, y, left, right, width):
+    start = max(np.searchsorted(x, left, 'left') - 1, 0)
+    stop = np.searchsorted(x, right, 'right') + 1
+    return minMaxDownsample(x[start:stop], y[start:stop], width)
+
+
+'''
+    Function: seriesLimits
+    Parameters: x, y
+    Return Value: (xmin, xmax, ymin, ymax) or None
+    Purpose: Returns the bounds of a series, leaving out its NaN gaps, None when it has no points.
+'''
+
+
+def seriesLimits(x, y):
+    shown = np.isfinite(x) & np.isfinite(y)
+    if not shown.any():
+        return None
+    x = x[shown]
+    y = y[shown]
+    return x.min(), x.max(), y.min(), y.max()
+
+
+'''
+    Function: fitLimits
+    Parameters: dataLimits, limits (default = None)
+    Return Value: (xmin, xmax, ymin, ymax) or None
+    Purpose: Returns limits unchanged if the data lies inside them, otherwise limits covering the data with
+             axisHeadroom to grow into.
+'''
+
+
+def fitLimits(dataLimits, limits=None):
+    if dataLimits is None:
+        return limits
+    xmin, xmax, ymin, ymax = dataLimits
+    if limits is not None:
+        left, right, bottom, top = limits
+        if left <= xmin and xmax <= right and bottom <= ymin and ymax <= top:
+            return limits
+    xSpan = max(xmax - xmin, 1)
+    ySpan = max(ymax - ymin, 1)
+    return xmin, xmax + xSpan * axisHeadroom, min(ymin - ySpan * 0.05, 0), ymax + ySpan * axisHeadroom
+
+
+class ChartJob():
+    '''
+        Function: __init__
+        Parameters: self, title, xLabel, yLabel
+        Return Value: N/A
+        Purpose: Everything needed to draw a chart away from the GUI thread. series maps a key (car ID) to a
+                 function returning the (x, y) of its line and the line's label, bars is a function returning the
+                 (heights, labels) of a bar chart. The functions are run by the worker, they have to work from data
+                 that won't change under them.
+    '''
+
+    def __init__(self, title, xLabel, yLabel):
+        self.title = title
+        self.xLabel = xLabel
+        self.yLabel = yLabel
+        self.series = {}
+        self.bars = None
+        # True for the labels of the lines or bars, or a list of labels
+        self.legend = None
+        self.width = 0
+        self.height = 0
+        self.dpi = defaultDpi
+        # axes to keep, fitted to the data when following it and kept as they are when zoomed
+        self.limits = None
+        self.following = True
+        self.downsample = True
+        # set by ChartRenderer.submit
+        self.target = None
+        self.generation = 0
+
+    '''
+        Function: copy
+        Parameters: self
+        Return Value: ChartJob
+        Purpose: Returns a job with the same chart, for submitting while this one is changed further.
+    '''
+
+    def copy(self):
+        job = ChartJob(self.title, self.xLabel, self.yLabel)
+        job.__dict__.update(self.__dict__)
+        job.series = dict(self.series)
+        return job
+
+
+class Chart():
+    '''
+        Function: __init__
+        Parameters: self, job
+        Return Value: N/A
+        Purpose: A chart as drawn for job. series maps each key to the (x, y, label) of the points of its line that
+                 were drawn, bars is the (heights, labels) drawn. image is the drawn chart, and axesBox the
+                 (left, top, width, height) of the axes on it in pixels.
+    '''
+
+    def __init__(self, job):
+        self.target = job.target
+        self.generation = job.generation
+        self.title = job.title
+        self.xLabel = job.xLabel
+        self.yLabel = job.yLabel
+        self.legend = job.legend
+        self.series = {}
+        self.bars = None
+        self.dataLimits = None
+        self.limits = None
+        self.image = None
+        self.axesBox = None
+
+
+'''
+    Function: prepareChart
+    Parameters: job, cancelled (function returning whether or not to stop, default = never)
+    Return Value: Chart or None
+    Purpose: Works out the series of job, the axes they're drawn on and the points of them to draw. None if it was
+             cancelled on the way.
+'''
+
+
+def prepareChart(job, cancelled=lambda: False):
+    chart = Chart(job)
+    if job.bars is not None:
+        heights, labels = job.bars()
+        chart.bars = (np.asarray(heights, dtype=np.float64), list(labels))
+        return None if cancelled() else chart
+
+    series = {}
+    extents = []
+    for key, (build, label) in job.series.items():
+        if cancelled():
+            return None
+        x, y = build()
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        series[key] = (x, y, label)
+        limits = seriesLimits(x, y)
+        if limits is not None:
+            extents.append(limits)
+    if extents:
+        extents = np.array(extents)
+        chart.dataLimits = (extents[:, 0].min(), extents[:, 1].max(), extents[:, 2].min(), extents[:, 3].max())
+    chart.limits = fitLimits(chart.dataLimits, job.limits) if job.following else job.limits
+    if chart.limits is None:
+        chart.limits = fitLimits(chart.dataLimits)
+
+    for key, (x, y, label) in series.items():
+        if cancelled():
+            return None
+        if job.downsample and chart.limits is not None:
+            x, y = sampleSeries(x, y, chart.limits[0], chart.limits[1], int(job.width))
+        chart.series[key] = (x, y, label)
+    return chart
+
+
+'''
+    Function: drawFigure
+    Parameters: chart, width, height, dpi (default = defaultDpi)
+    Return Value: (Figure, Axes)
+    Purpose: Returns a figure of width by height pixels with chart drawn on it, attached to an Agg canvas. Lines
+             are ticked at whole laps picked by a locator rather than at every one. Bars are told apart by a legend,
+             or without one by their labels along the x axis.
+'''
+
+
+def drawFigure(chart, width, height, dpi=defaultDpi):
+    figure = Figure(figsize=(max(width, 1) / dpi, max(height, 1) / dpi), dpi=dpi, tight_layout=True)
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot(111)
+    axes.set_title(chart.title)
+    axes.set_xlabel(chart.xLabel)
+    axes.set_ylabel(chart.yLabel)
+    axes.grid(True)
+
+    if chart.bars is not None:
+        heights, labels = chart.bars
+        # range is 1 because only 1 set of bars
+        index = np.arange(1)
+        barWidth = .5
+        handles = axes.bar(index + barWidth * np.arange(len(heights)), heights, width=barWidth, alpha=.8,
+                           color=['C' + str(i % 10) for i in range(len(heights))])
+        for bar, label in zip(handles, labels):
+            bar.set_label(label)
+        if chart.legend is None:
+            axes.set_xticks(index + barWidth * np.arange(len(heights)))
+            axes.set_xticklabels(labels, rotation=90, fontsize='small')
+        else:
+            axes.set_xticks(index)
+            axes.set_xticklabels([' '])
+        handles = list(handles)
+    else:
+        handles = [axes.plot(x, y, label=label)[0] for x, y, label in chart.series.values()]
+        axes.xaxis.set_major_locator(MaxNLocator(integer=True))
+        if chart.limits is not None:
+            left, right, bottom, top = chart.limits
+            axes.set_xlim(left, right)
+            axes.set_ylim(bottom, top)
+
+    if chart.legend is not None and handles:
+        if chart.legend is True:
+            axes.legend(handles, [handle.get_label() for handle in handles])
+        else:
+            axes.legend(handles, chart.legend)
+    return figure, axes
+
+
+'''
+    Function: renderChart
+    Parameters: job, cancelled (function returning whether or not to stop, default = never)
+    Return Value: Chart or None
+    Purpose: Prepares and draws the chart of job into a QImage, None if it was cancelled on the way.
+'''
+
+
+def renderChart(job, cancelled=lambda: False):
+    chart = prepareChart(job, cancelled)
+    if chart is None or cancelled():
+        return None
+    width = max(int(job.width), 1)
+    height = max(int(job.height), 1)
+    figure, axes = drawFigure(chart, width, height, job.dpi)
+    figure.canvas.draw()
+    if cancelled():
+        return None
+    pixels = figure.canvas.buffer_rgba()
+    height, width = pixels.shape[:2]
+    chart.image = QImage(pixels, width, height, width * 4, QImage.Format_RGBA8888).copy()
+    left, bottom, boxWidth, boxHeight = axes.bbox.bounds
+    chart.axesBox = (left, height - bottom - boxHeight, boxWidth, boxHeight)
+    return chart
+
+
+class ChartRenderer(QObject):
+    # a chart has been drawn, emitted from the worker thread with the Chart
+    chartReady = pyqtSignal(object)
+
+    '''
+        Function: __init__
+        Parameters: self
+        Return Value: N/A
+        Purpose: Worker drawing submitted charts one at a time, started with the first one.
+    '''
+
+    def __init__(self):
+        super().__init__()
+        self.condition = threading.Condition()
+        # target to its job waiting to be drawn, oldest first, and the generation of its newest job
+        self.pending = {}
+        self.latest = {}
+        self.busy = False
+        self.running = True
+        self.thread = None
+
+        # jobs submitted, drawn, replaced before they were started, abandoned while being drawn, and that failed
+        self.submitted = 0
+        self.rendered = 0
+        self.superseded = 0
+        self.cancelled = 0
+        self.failed = 0
+
+    '''
+        Function: submit
+        Parameters: self, target, job (ChartJob)
+        Return Value: int
+        Purpose: Queues job to be drawn for target, replacing any job of target's still waiting and cancelling one
+                 being drawn. Returns the job's generation, which the Chart it's drawn into will carry.
+    '''
+
+    def submit(self, target, job):
+        with self.condition:
+            job.target = target
+            job.generation = self.latest.get(target, 0) + 1
+            self.latest[target] = job.generation
+            if self.pending.pop(target, None) is not None:
+                self.superseded += 1
+            self.pending[target] = job
+            self.submitted += 1
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.renderCharts, daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+        return job.generation
+
+    '''
+        Function: cancel
+        Parameters: self, target
+        Return Value: N/A
+        Purpose: Drops target's job waiting to be drawn and abandons one being drawn.
+    '''
+
+    def cancel(self, target):
+        with self.condition:
+            if target in self.latest:
+                self.latest[target] += 1
+            if self.pending.pop(target, None) is not None:
+                self.superseded += 1
+
+    '''
+        Function: isCurrent
+        Parameters: self, job
+        Return Value: Boolean Condition
+        Purpose: Returns whether or not job is still the newest of its target's.
+    '''
+
+    def isCurrent(self, job):
+        return self.running and self.latest.get(job.target) == job.generation
+
+    '''
+        Function: renderCharts
+        Parameters: self
+        Return Value: N/A
+        Purpose: Runs in the worker thread, drawing the oldest waiting job and posting its chart until stopped.
+    '''
+
+    def renderCharts(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending or not self.running)
+                if not self.running:
+                    return
+                target = next(iter(self.pending))
+                job = self.pending.pop(target)
+                self.busy = True
+            chart = failed = None
+            try:
+                chart = renderChart(job, lambda: not self.isCurrent(job))
+            except Exception as e:
+                failed = e
+                getLog().error('[' + __name__ + '] ' + 'Chart ' + str(job.title) + ' could not be drawn: ' + str(e))
+            with self.condition:
+                if failed is not None:
+                    self.failed += 1
+                elif chart is None:
+                    self.cancelled += 1
+                else:
+                    self.rendered += 1
+                    self.chartReady.emit(chart)
+                self.busy = False
+                self.condition.notify_all()
+
+    '''
+        Function: waitIdle
+        Parameters: self, timeout (default = None)
+        Return Value: Boolean Condition
+        Purpose: Waits for every job submitted to be drawn or cancelled, returning False if timeout ran out first.
+    '''
+
+    def waitIdle(self, timeout=None):
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.pending and not self.busy, timeout)
+
+    '''
+        Function: stop
+        Parameters: self
+        Return Value: N/A
+        Purpose: Drops waiting jobs and stops the worker, a chart being drawn is abandoned.
+    '''
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.pending.clear()
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    '''
+        Function: getStats
+        Parameters: self
+        Return Value: dict
+        Purpose: Returns how many jobs were submitted, drawn, replaced before being started, abandoned and failed.
+    '''
+
+    def getStats(self):
+        return {'submitted': self.submitted, 'rendered': self.rendered, 'superseded': self.superseded,
+                'cancelled': self.cancelled, 'failed': self.failed}
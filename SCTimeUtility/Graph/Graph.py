@@ -1,21 +1,28 @@
 """
 
-    Module:
-    Purpose:
-    Depends On:
-
-    #TODO: Needs Reworking
+    Module: Graph.py
+    Purpose: Options for charting teams' laps, and the live chart they're drawn on. Each graph type has a Plot in
+             the embedded GraphWidget, applying a type draws the chosen teams on its plot and from then on the plot
+             follows the CarStorage, redrawn as the laps of the cars on it change.
+             What's charted comes from the cached series of LapSeries. A chart is drawn by the ChartRenderer shared
+             by the plots, away from the GUI thread: each team's series is a snapshot of its laps taken when the
+             chart is asked for, and working out averages, fastest and slowest laps from it is left to the renderer.
+    Depends On: functools, PyQt, GraphWidget, Plot, LapSeries, ChartRenderer
 
 """
 
-import matplotlib.pyplot as plt, numpy as np
 from enum import IntEnum
+from functools import partial
 
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtWidgets import QApplication, QWidget, QStyle
 from PyQt5.uic import loadUi
 
 from SCTimeUtility.Graph import graphUIPath
+from SCTimeUtility.Graph.ChartRenderer import ChartRenderer
+from SCTimeUtility.Graph.GraphWidget import GraphWidget
+from SCTimeUtility.Graph.LapSeries import SeriesCache, averageLapTimes, lapTimes
+from SCTimeUtility.Graph.Plot import Plot
 from SCTimeUtility.Log.Log import getLog
 
 
@@ -26,33 +33,66 @@ class GraphType(IntEnum):
     MAX_TIME = 3
 
 
+'''
+    Function: extremeLapTimes
+    Parameters: teams (list of (label, CarSeries)), scale (seconds in the unit graphed), slowest
+    Return Value: (list of times, list of labels)
+    Purpose: Returns the fastest lap of every team with one, or the slowest if slowest is set, and the team's label.
+'''
+
+
+def extremeLapTimes(teams, scale, slowest):
+    data = []
+    labels = []
+    for label, series in teams:
+        lapTime = series.slowest() if slowest else series.fastest()
+        if lapTime is not None:
+            data.append(lapTime / scale)
+            labels.append(label)
+    return data, labels
+
+
 class Graph(QWidget):
     maxGraphNumber = 100
 
-    def __init__(self):
+    def __init__(self, carStorage=None):
         super().__init__()
         self.GraphDict = ["Lap vs Time", "Average Lap vs Time", "Minimum Time", "Maximum Time"]
         self.currentGraphType = self.GraphDict[GraphType.LAP_TIME]
         self.graphedTeamList = []
-        self.currGraphNum = 1
         self.inMinutes = False
 
         self.teamList = []
+        self.carStorage = None
+        # embedded chart with a plot per graph type drawn by the renderer, and the type drawn last which is kept
+        # up to date
+        self.chart = None
+        self.plots = []
+        self.renderer = ChartRenderer()
+        self.liveGraphType = None
+        # series of each car's laps, worked out once per change to them
+        self.series = SeriesCache()
 
         self.initUI()
         self.addGraphs()
         self.handleUpdate(self.teamList)
         self.bindListeners()
+        if carStorage is not None:
+            self.setCarStorage(carStorage)
 
     '''  
         Function: initUI
         Parameters: self
         Return Value: N/A
-        Purpose: Initializes and loads resource file for the Graph Widget.
+        Purpose: Initializes and loads resource file for the Graph Widget, with the chart beside the options.
     '''
 
     def initUI(self):
         self.ui = loadUi(graphUIPath, self)
+        self.chart = GraphWidget()
+        self.gridLayout_3.addWidget(self.chart, 0, 1, 3, 1)
+        self.gridLayout_3.setColumnStretch(1, 1)
+        self.resize(self.width() + 640, max(self.height(), 480))
         self.setGeometry(QStyle.alignedRect(Qt.RightToLeft, Qt.AlignBottom,
                                             self.size(), QApplication.desktop().availableGeometry()))
 
@@ -67,6 +107,9 @@ class Graph(QWidget):
     def addGraphs(self):
         for graph in self.GraphDict:
             self.GraphTypes.addItem(graph)
+            plot = Plot(renderer=self.renderer)
+            self.plots.append(plot)
+            self.chart.addPlot(plot, graph)
 
     '''  
         Function: bindListeners
@@ -90,7 +133,37 @@ class Graph(QWidget):
     '''
 
     def updateTeamList(self, newTeamList):
-        self.teamList = newTeamList
+        self.teamList = list(newTeamList)
+
+    '''  
+        Function: setCarStorage
+        Parameters: self, carStorage
+        Return Value: N/A
+        Purpose: Sets the CarStorage teams are charted from, following its cars as they're added and their laps as
+                 they change.
+    '''
+
+    def setCarStorage(self, carStorage):
+        if self.carStorage is not None:
+            self.carStorage.carsInserted.disconnect(self.carsInserted)
+            self.carStorage.dataRangeModified.disconnect(self.dataChanged)
+        self.carStorage = carStorage
+        carStorage.carsInserted.connect(self.carsInserted)
+        carStorage.dataRangeModified.connect(self.dataChanged)
+        self.handleUpdate(carStorage.storageList)
+
+    def carsInserted(self, first, last):
+        self.handleUpdate(self.carStorage.storageList)
+
+    '''  
+        Function: dataChanged
+        Parameters: self, firstID, lastID, firstLap, lastLap (range of CarStorage.dataRangeModified)
+        Return Value: N/A
+        Purpose: Updates the live chart with the laps of the graphed cars in the range of IDs that changed.
+    '''
+
+    def dataChanged(self, firstID, lastID, firstLap, lastLap):
+        self.refreshGraph([team for team in self.graphedTeamList if firstID <= team.ID <= lastID])
 
     '''  
         Function: populateTeamChoiceBox
@@ -100,7 +173,11 @@ class Graph(QWidget):
     '''
 
     def populateTeamChoiceBox(self):
-        self.graphedTeamList = []
+        # teams stay graphed as long as they're still around
+        for team in [team for team in self.graphedTeamList if team not in self.teamList]:
+            self.removeTeamFromGraphList(team.getTeam())
+            for item in self.ChosenTeamList.findItems(team.getTeam(), Qt.MatchExactly):
+                self.ChosenTeamList.takeItem(self.ChosenTeamList.row(item))
         self.TeamChoiceBox.clear()
         for x in range(0, len(self.teamList)):
             self.TeamChoiceBox.addItem(str(self.teamList[x].getTeam()), x)
@@ -114,6 +191,8 @@ class Graph(QWidget):
 
     def timeToggle(self):
         self.inMinutes = self.MinuteButton.isChecked()
+        if self.liveGraphType is not None:
+            self.drawGraph(self.liveGraphType)
 
     '''  
         Function: handleUpdate
@@ -128,20 +207,48 @@ class Graph(QWidget):
 
     '''  
         Function: drawGraph
-        Parameters: self
+        Parameters: self, graphType (default = None for the chosen type)
         Return Value: N/A
-        Purpose: 
+        Purpose: Draws the chosen teams on the plot of a graph type, which is then kept up to date as laps come
+                 in until another type is drawn.
     '''
 
-    def drawGraph(self):
-        if self.currentGraphType == self.GraphDict[GraphType.LAP_TIME]:
+    def drawGraph(self, graphType=None):
+        if not isinstance(graphType, str):
+            # clicked passes the button's checked state
+            graphType = self.currentGraphType
+        if graphType == self.GraphDict[GraphType.LAP_TIME]:
             self.lapVsTimeGraph()
-        elif self.currentGraphType == self.GraphDict[GraphType.AVG_TIME]:
+        elif graphType == self.GraphDict[GraphType.AVG_TIME]:
             self.avgLapVsTimeGraph()
-        elif self.currentGraphType == self.GraphDict[GraphType.MIN_TIME]:
+        elif graphType == self.GraphDict[GraphType.MIN_TIME]:
             self.minTimeGraph()
-        elif self.currentGraphType == self.GraphDict[GraphType.MAX_TIME]:
+        elif graphType == self.GraphDict[GraphType.MAX_TIME]:
             self.maxTimeGraph()
+        self.liveGraphType = graphType
+
+    '''  
+        Function: refreshGraph
+        Parameters: self, teams (default = None for every graphed team)
+        Return Value: N/A
+        Purpose: Brings the live chart up to date with the laps of teams. Lines are given snapshots of their
+                 new laps, bar charts are described again, and the chart is redrawn.
+    '''
+
+    def refreshGraph(self, teams=None):
+        if self.liveGraphType is None or not self.graphedTeamList:
+            return
+        graphType = GraphType(self.GraphDict.index(self.liveGraphType))
+        if graphType in (GraphType.MIN_TIME, GraphType.MAX_TIME):
+            self.drawGraph(self.liveGraphType)
+            return
+        if teams is not None and not teams:
+            return
+        plot = self.plots[graphType]
+        series = self.lapSeries if graphType == GraphType.LAP_TIME else self.avgLapSeries
+        for team in self.graphedTeamList if teams is None else teams:
+            plot.setSeries(team.ID, series(team), team.getTeam())
+        plot.refresh()
 
     '''  
         Function: teamChosen
@@ -151,7 +258,8 @@ class Graph(QWidget):
     '''
 
     def teamChosen(self, index):
-        self.addTeamToGraphList(self.TeamChoiceBox.currentIndex())
+        if self.addTeamToGraphList(self.TeamChoiceBox.currentIndex()) and self.liveGraphType is not None:
+            self.drawGraph(self.liveGraphType)
 
     '''  
         Function: addTeamToGraphList
@@ -182,10 +290,12 @@ class Graph(QWidget):
 
     def removeTeamFromGraphList(self, teamName):
         # search Graph list and remove found element
-        for i in range(0, len(self.graphedTeamList) - 1):
+        for i in range(0, len(self.graphedTeamList)):
             team = self.graphedTeamList[i]
             if team.getTeam() == teamName:
                 self.graphedTeamList.pop(i)
+                for plot in self.plots:
+                    plot.removeSeries(team.ID)
                 return True
         return False
 
@@ -202,6 +312,8 @@ class Graph(QWidget):
         self.removeTeamFromGraphList(teamName)
         # remove the team from the list
         self.ChosenTeamList.takeItem(self.ChosenTeamList.currentRow())
+        if self.liveGraphType is not None:
+            self.drawGraph(self.liveGraphType)
 
     '''  
         Function: typeChosen
@@ -215,22 +327,67 @@ class Graph(QWidget):
         if text in self.GraphDict:
             self.currentGraphType = text
 
+    def timeScale(self):
+        return 60 if self.inMinutes else 1
+
     '''  
-        Function: getElapsed
-        Parameters: self, lapList
-        Return Value: list of LapTime.elapsedTime values.
-        Purpose: Appends a new list of laptimes for plotting Graph, based on either minutes or seconds.
+        Function: timeLabel
+        Parameters: self, name
+        Return Value: str
+        Purpose: Returns an axis label for a time called name, in the unit being graphed.
     '''
 
-    def getElapsed(self, lapList):
-        elapsed = []
+    def timeLabel(self, name):
         if self.inMinutes:
-            for lap in lapList:
-                elapsed.append(lap / 60)
-        else:
-            for lap in lapList:
-                elapsed.append(lap)
-        return elapsed
+            return name + ' (minutes)'
+        return name + ' (seconds)'
+
+    '''  
+        Function: lapSeries
+        Parameters: self, team
+        Return Value: function returning (numpy.ndarray of laps, numpy.ndarray of lap times)
+        Purpose: Returns a function building the lap times of a team as its laps are now, for the renderer.
+    '''
+
+    def lapSeries(self, team):
+        return partial(lapTimes, self.series.get(team), self.timeScale())
+
+    '''  
+        Function: avgLapSeries
+        Parameters: self, team
+        Return Value: function returning (numpy.ndarray of laps, numpy.ndarray of times)
+        Purpose: Returns a function building the average lap time of a team up to every lap as its laps are now,
+                 for the renderer.
+    '''
+
+    def avgLapSeries(self, team):
+        return partial(averageLapTimes, self.series.get(team), self.timeScale())
+
+    '''  
+        Function: showPlot
+        Parameters: self, graphType, title, yLabel
+        Return Value: Plot
+        Purpose: Brings the plot of graphType to the front, cleared for a new chart.
+    '''
+
+    def showPlot(self, graphType, title, xLabel, yLabel):
+        plot = self.chart.editPlot(graphType)
+        plot.createPlot(title, xLabel, yLabel)
+        return plot
+
+    '''  
+        Function: lineGraph
+        Parameters: self, graphType, title, yLabel, series
+        Return Value: N/A
+        Purpose: Draws a line per graphed team on the plot of graphType, from the series function given.
+    '''
+
+    def lineGraph(self, graphType, title, yLabel, series):
+        plot = self.showPlot(graphType, title, 'Lap', yLabel)
+        for team in self.graphedTeamList:
+            plot.setSeries(team.ID, series(team), team.getTeam())
+        plot.createLegend()
+        plot.refresh()
 
     '''  
         Function: lapVsTimeGraph
@@ -240,37 +397,7 @@ class Graph(QWidget):
     '''
 
     def lapVsTimeGraph(self):
-
-        plt.figure(self.currGraphNum)
-        # set labels
-        plt.title('Lap vs Time')
-        plt.xlabel('Lap')
-        if self.inMinutes:
-            plt.ylabel('Time (minutes)')
-        else:
-            plt.ylabel('Time (seconds)')
-
-        # plot data
-        index = 0
-        for team in self.graphedTeamList:
-            durationList = []
-            graphRange = np.arange(0, len(self.graphedTeamList[index].lapList), 1.0)
-            plt.xticks(np.arange(1.0, len(self.graphedTeamList[index].lapList) + 1, 1.0))
-            for lap in team.lapList:
-                durationList.append(lap.getElapsed())
-            durationList = self.getElapsed(durationList)
-            # plot curent Team
-            plt.plot(graphRange, durationList, label=team.getTeam())
-            index += 1
-
-        if len(self.graphedTeamList) > 0:
-            plt.legend()
-        plt.tight_layout()
-        plt.grid(True)
-        plt.show()
-
-        # increments the figure number to guarantee new window for next Graph
-        self.currGraphNum += 1
+        self.lineGraph(GraphType.LAP_TIME, 'Lap vs Time', self.timeLabel('Time'), self.lapSeries)
 
     '''  
         Function: avgLapVsTimeGraph
@@ -280,43 +407,8 @@ class Graph(QWidget):
     '''
 
     def avgLapVsTimeGraph(self):
-
-        plt.figure(self.currGraphNum)
-
-        # set labels
-        plt.title('Lap vs Average Time')
-        plt.xlabel('Lap')
-        if self.inMinutes:
-            plt.ylabel('Average Time (minutes)')
-        else:
-            plt.ylabel('Average Time (seconds)')
-
-        # plot team lap averages
-        index = 0
-        for team in self.graphedTeamList:
-            lapAverages = []
-            graphRange = np.arange(0, len(team.lapList), 1.0)
-            plt.xticks(np.arange(1.0, len(team.lapList) + 1, 1.0))
-
-            # for every lap for current team calculate the average time
-            currLap = 0
-            for lap in team.lapList:
-                if self.inMinutes:
-                    lapAverages.append((lap.getElapsed() / ((currLap + 1) * 60)))
-                else:
-                    lapAverages.append(lap.getElapsed() / (currLap + 1))
-                currLap += 1
-
-            plt.plot(graphRange, lapAverages, label=team.getTeam())
-        if len(self.graphedTeamList) > 0:
-            plt.legend()
-
-        plt.tight_layout()
-        plt.grid(True)
-        plt.show()
-
-        # increments the figure number to guarantee new window
-        self.currGraphNum += 1
+        self.lineGraph(GraphType.AVG_TIME, 'Lap vs Average Time', self.timeLabel('Average Time'),
+                       self.avgLapSeries)
 
     '''  
         Function: minTimeGraph
@@ -326,86 +418,43 @@ class Graph(QWidget):
     '''
 
     def minTimeGraph(self):
-        labels = []
-        data = []
-
-        # calculate minimum times for teams
-        for team in self.graphedTeamList:
-            lapList = []
-            for lap in team.lapList:
-                if lap.getElapsed() != 0:
-                    lapList.append(lap.getElapsed())
-
-            data.append(min(lapList))
-            labels.append(team.getTeam())
-
         # send data to bar Graph
-        if self.inMinutes:
-            self.barGraph(data, labels, 'Minimum Times', 'Teams', 'Time (minutes)')
-        else:
-            self.barGraph(data, labels, 'Minimum Times', 'Teams', 'Time (seconds)')
+        self.barGraph(GraphType.MIN_TIME, partial(extremeLapTimes, self.teamSeries(), self.timeScale(), False),
+                      'Minimum Times', 'Teams', self.timeLabel('Time'))
 
     '''  
         Function: maxTimeGraph
         Parameters: self
         Return Value: N/A
-        Purpose: Creates a Graph based on the minimum Time of each Car at certain intervals.
+        Purpose: Creates a Graph based on the maximum Time of each Car at certain intervals.
     '''
 
     def maxTimeGraph(self):
-        labels = []
-        data = []
-
-        # calculate minimum times for teams
-        for team in self.graphedTeamList:
-            lapList = []
-            for lap in team.lapList:
-                if lap.getElapsed() != 0:
-                    lapList.append(lap.getElapsed())
+        # send data to bar Graph
+        self.barGraph(GraphType.MAX_TIME, partial(extremeLapTimes, self.teamSeries(), self.timeScale(), True),
+                      'Maximum Times', 'Teams', self.timeLabel('Time'))
 
-            data.append(max(lapList))
-            labels.append(team.getTeam())
+    '''  
+        Function: teamSeries
+        Parameters: self
+        Return Value: list of (label, CarSeries)
+        Purpose: Returns every graphed team's label and the series of its laps as they are now.
+    '''
 
-        # send data to bar Graph
-        if self.inMinutes:
-            self.barGraph(data, labels, 'Maximum Times', 'Teams', 'Time (minutes)')
-        else:
-            self.barGraph(data, labels, 'Maximum Times', 'Teams', 'Time (seconds)')
+    def teamSeries(self):
+        return [(team.getTeam(), self.series.get(team)) for team in self.graphedTeamList]
 
     '''  
         Function: barGraph
-        Parameters: self, data, labels, title, x_axis, y_axis
+        Parameters: self, graphType, bars, title, x_axis, y_axis
         Return Value: N/A
-        Purpose: Creates a bar Graph based on laps or Lap Times of each car.
+        Purpose: Creates a bar Graph based on laps or Lap Times of each car, on the plot of graphType. bars is run
+                 by the renderer and returns the (data, labels) of the bars.
     '''
 
-    def barGraph(self, data, labels, title, x_axis, y_axis):
-        # increments the figure number to guarantee new window
-        plt.figure(self.currGraphNum)
-        self.currGraphNum += 1
-
-        # Graph Settings
-        # range is 1 because only 1 set of bars
-        index = np.arange(1)
-        bar_width = .5
-        opacity = .8
-
-        # add team to legend and plot their data
-        for i in range(len(data)):
-            plt.bar(index + bar_width * i, data[i],
-                    width=bar_width,
-                    label=labels[i],
-                    alpha=opacity)
-
-        # set labels
-        plt.title(title)
-        plt.xlabel(x_axis)
-        plt.ylabel(y_axis)
-        # remove x ticks
-        plt.xticks(index, ' ')
-        # add legend
-        if len(data) > 0:
-            plt.legend()
-
-        plt.tight_layout()
-        plt.show()
+    def barGraph(self, graphType, bars, title, x_axis, y_axis):
+        plot = self.showPlot(graphType, title, x_axis, y_axis)
+        plot.setBars(bars)
+        # add legend, left off when there are no bars
+        plot.createLegend()
+        plot.refresh()
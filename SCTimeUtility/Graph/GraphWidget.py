@@ -1,14 +1,13 @@
 """
 
-    Module:
-    Purpose:
-    Depends On:
+    Module: GraphWidget.py
+    Purpose: Tabs of Plots, the charts drawn by the Graph module are shown in one of these instead of a matplotlib
+             window of their own.
+    Depends On: PyQt, Plot
 
 """
 
-from PyQt5.QtWidgets import QWidget, QTabWidget
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib import pyplot
+from PyQt5.QtWidgets import QWidget, QTabWidget, QVBoxLayout
 
 
 class GraphWidget(QWidget):
@@ -16,15 +15,47 @@ class GraphWidget(QWidget):
     def __init__(self):
         super(GraphWidget, self).__init__()
         self.GraphTabs = QTabWidget()
+        self.plots = []
+        self.initUI()
 
     def initUI(self):
-        pass
-
-    def addPlot(self, plot):
-        pass
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.GraphTabs)
+
+    '''
+        Function: addPlot
+        Parameters: self, plot, name (default = '')
+        Return Value: int
+        Purpose: Adds plot as a tab named name, returning its index.
+    '''
+
+    def addPlot(self, plot, name=''):
+        self.plots.append(plot)
+        return self.GraphTabs.addTab(plot, name)
+
+    '''
+        Function: removePlot
+        Parameters: self, plotIndex
+        Return Value: N/A
+        Purpose: Removes the tab at plotIndex and deletes its plot.
+    '''
 
     def removePlot(self, plotIndex):
-        pass
+        plot = self.plots.pop(plotIndex)
+        self.GraphTabs.removeTab(plotIndex)
+        plot.deleteLater()
+
+    '''
+        Function: editPlot
+        Parameters: self, plotIndex
+        Return Value: Plot
+        Purpose: Brings the tab at plotIndex to the front, returning its plot to be drawn on.
+    '''
 
     def editPlot(self, plotIndex):
-        pass
+        self.GraphTabs.setCurrentIndex(plotIndex)
+        return self.plots[plotIndex]
+
+    def getPlot(self, plotIndex):
+        return self.plots[plotIndex]
@@ -0,0 +1,212 @@
+"""
+
+    Module: LapSeries.py
+    Purpose: The numbers the Graph module charts, worked out with whole array NumPy operations over a car's laps
+             rather than a LapView per lap. A car's laps are copied out of its LapStore into an array of seconds
+             once, every series is derived from that array the first time it's asked for, and SeriesCache keeps
+             them until the store's version shows its laps have changed. As in LapStatistics the seed lap and
+             removed laps are stored as zero and left out of averages, minimums, maximums and percentiles.
+             The series a team's charts plot are here too, so they can be worked out without the Qt widgets.
+    Depends On: numpy
+
+"""
+
+import numpy as np
+
+# laps averaged over by rollingAverage when no window is given
+defaultWindow = 5
+
+
+class CarSeries():
+    '''
+        Function: __init__
+        Parameters: self, elapsed (numpy.ndarray of int64 microseconds)
+        Return Value: N/A
+        Purpose: Series of one car's laps, from a copy of their elapsed times.
+    '''
+
+    def __init__(self, elapsed):
+        self.times = np.asarray(elapsed, dtype=np.float64) / 1000000
+        self.valid = self.times > 0
+        self.laps = np.arange(0, len(self.times), 1.0)
+        self.validTimes = self.times[self.valid]
+        self.cache = {}
+
+    def __len__(self):
+        return len(self.times)
+
+    '''
+        Function: lapTimes
+        Parameters: self
+        Return Value: (numpy.ndarray of laps, numpy.ndarray of seconds)
+        Purpose: Returns the time of every lap, the seed lap and removed laps included as zero.
+    '''
+
+    def lapTimes(self):
+        return self.laps, self.times
+
+    '''
+        Function: cumulativeAverage
+        Parameters: self
+        Return Value: (numpy.ndarray of laps, numpy.ndarray of seconds)
+        Purpose: Returns the mean of the valid laps up to and including every lap, NaN before the first one.
+    '''
+
+    def cumulativeAverage(self):
+        if 'average' not in self.cache:
+            totals = np.cumsum(np.where(self.valid, self.times, 0.0))
+            counts = np.cumsum(self.valid)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                self.cache['average'] = np.where(counts > 0, totals / counts, np.nan)
+        return self.laps, self.cache['average']
+
+    '''
+        Function: rollingAverage
+        Parameters: self, window (default = defaultWindow)
+        Return Value: (numpy.ndarray of laps, numpy.ndarray of seconds)
+        Purpose: Returns the mean of the valid laps among every lap and the window - 1 before it, NaN where there
+                 are none.
+    '''
+
+    def rollingAverage(self, window=defaultWindow):
+        if window < 1:
+            raise ValueError("Rolling average window must be at least 1 lap: " + str(window))
+        key = ('rolling', window)
+        if key not in self.cache:
+            totals = np.concatenate(([0.0], np.cumsum(np.where(self.valid, self.times, 0.0))))
+            counts = np.concatenate(([0], np.cumsum(self.valid)))
+            start = np.maximum(np.arange(1, len(totals)) - window, 0)
+            windowTotals = totals[1:] - totals[start]
+            windowCounts = counts[1:] - counts[start]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                self.cache[key] = np.where(windowCounts > 0, windowTotals / windowCounts, np.nan)
+        return self.laps, self.cache[key]
+
+    '''
+        Function: runningMinimum
+        Parameters: self
+        Return Value: (numpy.ndarray of laps, numpy.ndarray of seconds)
+        Purpose: Returns the fastest valid lap up to and including every lap, NaN before the first one.
+    '''
+
+    def runningMinimum(self):
+        if 'minimum' not in self.cache:
+            self.cache['minimum'] = np.fmin.accumulate(np.where(self.valid, self.times, np.nan))
+        return self.laps, self.cache['minimum']
+
+    '''
+        Function: runningMaximum
+        Parameters: self
+        Return Value: (numpy.ndarray of laps, numpy.ndarray of seconds)
+        Purpose: Returns the slowest valid lap up to and including every lap, NaN before the first one.
+    '''
+
+    def runningMaximum(self):
+        if 'maximum' not in self.cache:
+            self.cache['maximum'] = np.fmax.accumulate(np.where(self.valid, self.times, np.nan))
+        return self.laps, self.cache['maximum']
+
+    '''
+        Function: fastest
+        Parameters: self
+        Return Value: float seconds or None
+        Purpose: Returns the fastest valid lap, None if there is none.
+    '''
+
+    def fastest(self):
+        if 'fastest' not in self.cache:
+            self.cache['fastest'] = float(self.validTimes.min()) if len(self.validTimes) else None
+        return self.cache['fastest']
+
+    '''
+        Function: slowest
+        Parameters: self
+        Return Value: float seconds or None
+        Purpose: Returns the slowest valid lap, None if there is none.
+    '''
+
+    def slowest(self):
+        if 'slowest' not in self.cache:
+            self.cache['slowest'] = float(self.validTimes.max()) if len(self.validTimes) else None
+        return self.cache['slowest']
+
+    '''
+        Function: percentiles
+        Parameters: self, percents (number or sequence of numbers between 0 and 100)
+        Return Value: float or numpy.ndarray of seconds, None if there are no valid laps
+        Purpose: Returns the lap times below which percents of the valid laps fall.
+    '''
+
+    def percentiles(self, percents):
+        if not len(self.validTimes):
+            return None
+        key = ('percentiles', tuple(np.atleast_1d(percents)), np.ndim(percents))
+        if key not in self.cache:
+            self.cache[key] = np.percentile(self.validTimes, percents)
+        return self.cache[key]
+
+
+class SeriesCache():
+    '''
+        Function: __init__
+        Parameters: self
+        Return Value: N/A
+        Purpose: CarSeries of every car asked for by ID, rebuilt when the car's laps have changed.
+    '''
+
+    def __init__(self):
+        # car ID to (LapStore, its version, CarSeries)
+        self.entries = {}
+        # series handed out from the cache, and built
+        self.hits = 0
+        self.misses = 0
+
+    '''
+        Function: get
+        Parameters: self, car
+        Return Value: CarSeries
+        Purpose: Returns the series of car, building them again if its laps were written to or replaced since.
+    '''
+
+    def get(self, car):
+        store = car.lapList
+        entry = self.entries.get(car.ID)
+        if entry is not None and entry[0] is store and entry[1] == store.version:
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        series = CarSeries(store.elapsedArray())
+        self.entries[car.ID] = (store, store.version, series)
+        return series
+
+    def invalidate(self, ID):
+        self.entries.pop(ID, None)
+
+    def clear(self):
+        self.entries.clear()
+
+
+'''
+    Function: lapTimes
+    Parameters: series (CarSeries), scale (seconds in the unit graphed)
+    Return Value: (numpy.ndarray of laps, numpy.ndarray of lap times)
+    Purpose: Returns the lap time of every lap of a team.
+'''
+
+
+def lapTimes(series, scale):
+    laps, times = series.lapTimes()
+    return laps, times / scale
+
+
+'''
+    Function: averageLapTimes
+    Parameters: series (CarSeries), scale (seconds in the unit graphed)
+    Return Value: (numpy.ndarray of laps, numpy.ndarray of times)
+    Purpose: Returns the average of a team's lap times up to every lap.
+'''
+
+
+def averageLapTimes(series, scale):
+    laps, averages = series.cumulativeAverage()
+    return laps, averages / scale
@@ -1,27 +1,233 @@
 """
 
-    Module:
-    Purpose:
-    Depends On:
+    Module: Plot.py
+    Purpose: A chart embedded in a QWidget that can be updated live without drawing on the GUI thread. The plot
+             only keeps a ChartJob describing its chart, refresh hands a copy of it to a ChartRenderer and the chart
+             drawn from it is painted when it comes back. Charts asked for while one is still being drawn replace
+             it, so however often the plot is refreshed the latest chart is the one shown. As long as the axes
+             follow the data they're only grown, with some headroom, when the data outgrows them. The mouse wheel
+             zooms the laps in view about the cursor, a double click goes back to showing all of them.
+    Depends On: PyQt, ChartRenderer
 
 """
 
+import itertools
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPainter
 from PyQt5.QtWidgets import QWidget
 
+from SCTimeUtility.Graph.ChartRenderer import ChartJob, ChartRenderer
+
+# how much of the x axis is kept in view by a step of the mouse wheel
+zoomStep = 0.8
+# keys plots are known to their renderer by, so it never holds on to a widget
+plotKeys = itertools.count()
+
 
 class Plot(QWidget):
+    '''
+        Function: __init__
+        Parameters: self, parent (default = None), renderer (default = None for one of its own),
+                    downsample (default = True)
+        Return Value: N/A
+        Purpose: An empty chart drawn by renderer, with series downsampled to its width unless downsample is
+                 False.
+    '''
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, renderer=None, downsample=True):
         super(Plot, self).__init__(parent)
+        self.renderer = renderer if renderer is not None else ChartRenderer()
+        self.key = next(plotKeys)
+        # chart being described, and the last one drawn and shown
+        self.job = None
+        self.chart = None
+        # generation of the newest chart asked for, older ones that still arrive aren't shown
+        self.generation = 0
+        self.downsample = downsample
+        # axes of the last chart, kept covering the data until they're zoomed
+        self.limits = None
+        self.following = True
+
+        # charts shown
+        self.shown = 0
+
+        self.renderer.chartReady.connect(self.showChart, Qt.QueuedConnection)
+
+    '''
+        Function: createPlot
+        Parameters: self, title, xLabel, yLabel
+        Return Value: N/A
+        Purpose: Starts describing a new chart, without any series or bars, with axes that follow its data.
+    '''
+
+    def createPlot(self, title, xLabel, yLabel):
+        self.job = ChartJob(title, xLabel, yLabel)
+        self.limits = None
+        self.following = True
 
-    def createPlot(self):
-        pass
+    '''
+        Function: removePlot
+        Parameters: self
+        Return Value: N/A
+        Purpose: Removes everything from the plot, cancelling a chart still being drawn for it.
+    '''
 
     def removePlot(self):
-        pass
+        self.renderer.cancel(self.key)
+        self.job = None
+        self.chart = None
+        self.limits = None
+        self.following = True
+        self.update()
 
     def setAxis(self, x, y):
-        pass
+        if self.job is not None:
+            self.job.xLabel = x
+            self.job.yLabel = y
+
+    '''
+        Function: createLegend
+        Parameters: self, legendList (default = None for the labels of the series)
+        Return Value: N/A
+        Purpose: Adds a legend to the chart, if there's anything to put in it.
+    '''
+
+    def createLegend(self, legendList=None):
+        if self.job is not None:
+            self.job.legend = True if legendList is None else list(legendList)
+
+    '''
+        Function: setSeries
+        Parameters: self, key, build, label (default = None to keep the series' label)
+        Return Value: N/A
+        Purpose: Gives the series with key a new function building it, run by the renderer. build returns the
+                 (x, y) of the series, x increasing as laps do. Nothing is drawn until refresh is called.
+    '''
+
+    def setSeries(self, key, build, label=None):
+        if self.job is None:
+            return
+        if label is None and key in self.job.series:
+            label = self.job.series[key][1]
+        self.job.series[key] = (build, label)
+
+    def removeSeries(self, key):
+        if self.job is not None:
+            self.job.series.pop(key, None)
+
+    def hasSeries(self, key):
+        return self.job is not None and key in self.job.series
+
+    '''
+        Function: setBars
+        Parameters: self, build
+        Return Value: N/A
+        Purpose: Makes the chart a bar chart of a bar per value side by side. build is run by the renderer and
+                 returns the (heights, labels) of the bars.
+    '''
+
+    def setBars(self, build):
+        if self.job is not None:
+            self.job.bars = build
+
+    '''
+        Function: setDownsampling
+        Parameters: self, downsample
+        Return Value: N/A
+        Purpose: Turns drawing series downsampled to the width of the chart on or off.
+    '''
+
+    def setDownsampling(self, downsample):
+        self.downsample = downsample
+        self.refresh()
+
+    '''
+        Function: follow
+        Parameters: self
+        Return Value: N/A
+        Purpose: Goes back to keeping the axes covering the data after they've been zoomed.
+    '''
+
+    def follow(self):
+        self.following = True
+        self.limits = None
+        self.refresh()
+
+    '''
+        Function: refresh
+        Parameters: self
+        Return Value: int or None
+        Purpose: Has the chart as it's described now drawn at the size of the plot, returning the generation it'll
+                 be shown with, None when there's no chart.
+    '''
+
+    def refresh(self):
+        if self.job is None:
+            return None
+        job = self.job.copy()
+        job.width = self.width()
+        job.height = self.height()
+        job.limits = self.limits
+        job.following = self.following
+        job.downsample = self.downsample
+        self.generation = self.renderer.submit(self.key, job)
+        return self.generation
+
+    '''
+        Function: showChart
+        Parameters: self, chart
+        Return Value: N/A
+        Purpose: Runs in the GUI thread for every chart the renderer draws, showing the ones drawn for the newest
+                 chart asked of this plot.
+    '''
+
+    def showChart(self, chart):
+        if chart.target != self.key or chart.generation != self.generation or self.job is None:
+            return
+        self.chart = chart
+        if chart.bars is None:
+            self.limits = chart.limits
+        self.shown += 1
+        self.update()
+
+    def paintEvent(self, event):
+        if self.chart is None or self.chart.image is None:
+            return
+        painter = QPainter(self)
+        painter.drawImage(0, 0, self.chart.image)
+        painter.end()
+
+    def resizeEvent(self, event):
+        super(Plot, self).resizeEvent(event)
+        self.refresh()
+
+    '''
+        Function: zoom
+        Parameters: self, x (pixels across the plot), steps
+        Return Value: Boolean Condition
+        Purpose: Zooms the x axis of a line chart in by zoomStep a step, out for negative steps, keeping the lap at
+                 x where it is. Returns whether or not x was over the axes of a line chart.
+    '''
+
+    def zoom(self, x, steps):
+        chart = self.chart
+        if chart is None or chart.bars is not None or chart.limits is None or chart.axesBox is None:
+            return False
+        left, top, width, height = chart.axesBox
+        if not left <= x <= left + width:
+            return False
+        xmin, xmax, ymin, ymax = chart.limits
+        lap = xmin + (x - left) / width * (xmax - xmin)
+        scale = zoomStep ** steps
+        self.limits = (lap - (lap - xmin) * scale, lap + (xmax - lap) * scale, ymin, ymax)
+        self.following = False
+        self.refresh()
+        return True
+
+    def wheelEvent(self, event):
+        if not self.zoom(event.pos().x(), event.angleDelta().y() / 120):
+            super(Plot, self).wheelEvent(event)
 
-    def createLegend(self, legendList):
-        pass
+    def mouseDoubleClickEvent(self, event):
+        self.follow()
@@ -108,15 +108,12 @@ def minTimeGraph(self):
     labels = []
     data = []
 
-    # calculate minimum times for teams
+    # minimum times are kept up to date by each car as laps are recorded
     for team in self.graphedTeamList:
-        lapList = []
-        for lap in team.lapList:
-            if lap.getElapsed() != 0:
-                lapList.append(lap.getElapsed())
-
-        data.append(min(lapList))
-        labels.append(team.getTeam())
+        lapTime = team.getFastestLap()
+        if lapTime is not None:
+            data.append(lapTime)
+            labels.append(team.getTeam())
 
     # send data to bar Graph
     if self.inMinutes:
@@ -137,15 +134,12 @@ def maxTimeGraph(self):
     labels = []
     data = []
 
-    # calculate minimum times for teams
+    # maximum times are kept up to date by each car as laps are recorded
     for team in self.graphedTeamList:
-        lapList = []
-        for lap in team.lapList:
-            if lap.getElapsed() != 0:
-                lapList.append(lap.getElapsed())
-
-        data.append(max(lapList))
-        labels.append(team.getTeam())
+        lapTime = team.getSlowestLap()
+        if lapTime is not None:
+            data.append(lapTime)
+            labels.append(team.getTeam())
 
     # send data to bar Graph
     if self.inMinutes:
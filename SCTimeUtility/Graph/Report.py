@@ -0,0 +1,340 @@
+"""
+
+    Module: Report.py
+    Purpose: Command line entry point drawing the Graph module's charts of a saved session into a report directory,
+             without the GUI. The session is the file written by IO.saveCSV or a directory written by
+             FileSystem.exportCSV. Teams are handed out to a pool of worker processes, each reading a team's laps
+             itself, working out its series with LapSeries and saving its Lap vs Time and Lap vs Average Time charts
+             with matplotlib's Agg backend. Workers only send back the team's summary, the Minimum and Maximum
+             Times bar charts across teams are drawn from those once every team is done and summary.csv lists them.
+             A team that can't be read or drawn is reported and left out, and the command exits with 1.
+
+             sctime-report SESSION [-o OUTPUT] [-f png svg pdf] [-w WORKERS] [--minutes]
+
+    Depends On: argparse, multiprocessing, matplotlib, ChartRenderer, LapSeries, IO, FileSystem
+
+"""
+
+import argparse, csv, datetime, multiprocessing, os, re, sys, time
+from functools import partial
+
+from SCTimeUtility.Graph.ChartRenderer import ChartJob, defaultDpi, drawFigure, prepareChart
+from SCTimeUtility.Graph.LapSeries import CarSeries, averageLapTimes, lapTimes
+from SCTimeUtility.System.FileSystem import sortCarFiles, importCarCSV
+from SCTimeUtility.System.IO import parseCarRow
+
+# file name, title and name of the time graphed of the charts drawn for every team, and the function building them
+teamCharts = [('lap-time', 'Lap vs Time', 'Time', lapTimes),
+              ('average-time', 'Lap vs Average Time', 'Average Time', averageLapTimes)]
+# file name and title of the bar charts across teams, and the lap of each team's summary they're of
+barCharts = [('minimum-times', 'Minimum Times', 'fastest'), ('maximum-times', 'Maximum Times', 'slowest')]
+# teams a bar chart tells apart with a legend, more are labelled along the x axis instead
+legendLimit = 10
+# pixels a team's bar is given across, when that's wider than the charts are asked to be
+barPixels = 14
+# zlib level PNGs are saved at, a little larger than the default for half the time spent compressing
+pngCompression = 1
+summaryHeader = ['Car ID', 'Car Num', 'Team Name', 'Laps', 'Fastest', 'Slowest', 'Average', 'Charts']
+# line charts drawn by this process, (figure, axes, y tick labels it was laid out for) by file name, size and dpi
+figures = {}
+
+'''
+    Function: parseArguments
+    Parameters: argv (default = None for the command line's)
+    Return Value: argparse.Namespace
+    Purpose: Reads the options of a report, the output directory defaulting to one beside the session.
+'''
+
+
+def parseArguments(argv=None):
+    parser = argparse.ArgumentParser(prog='sctime-report',
+                                     description='Draws the charts of every team of a saved session into a '
+                                                 'report directory.')
+    parser.add_argument('session', help='CSV file saved by the time utility, or a directory of exported CSV files')
+    parser.add_argument('-o', '--output', help='directory to write the report to (default: SESSION-report)')
+    parser.add_argument('-f', '--formats', nargs='+', default=['png'], choices=['png', 'svg', 'pdf'],
+                        help='file formats of the charts (default: png)')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes drawing teams, 1 draws them in this one (default: one per CPU)')
+    parser.add_argument('--minutes', action='store_true', help='graph times in minutes rather than seconds')
+    parser.add_argument('--width', type=int, default=800, help='chart width in pixels (default: 800)')
+    parser.add_argument('--height', type=int, default=600, help='chart height in pixels (default: 600)')
+    parser.add_argument('--dpi', type=int, default=defaultDpi, help='pixels per inch (default: %(default)s)')
+    args = parser.parse_args(argv)
+    if args.output is None:
+        args.output = os.path.normpath(args.session) + '-report'
+    return args
+
+
+'''
+    Function: sessionTasks
+    Parameters: session (path), args
+    Return Value: list of (source, value, carID, args)
+    Purpose: Splits a session into one task per team for renderTeam, without reading any laps: a row of a file
+             written by saveCSV, or a file of a directory written by exportCSV with the ID importCSV would give it.
+             Any other csv file of the directory is a task too, after them, which renderTeam reports as failed.
+'''
+
+
+def sessionTasks(session, args):
+    if os.path.isdir(session):
+        files, others = sortCarFiles(session)
+        files += others
+        return [('file', files[x], x, args) for x in range(0, len(files))]
+    with open(session, 'r', newline='') as storageFile:
+        return [('row', row, None, args) for row in csv.reader(storageFile) if row]
+
+
+'''
+    Function: loadCar
+    Parameters: source, value, carID
+    Return Value: Car
+    Purpose: Reads the car of a task of sessionTasks.
+'''
+
+
+def loadCar(source, value, carID):
+    if source == 'file':
+        return importCarCSV(value, carID)
+    return parseCarRow(value)
+
+
+'''
+    Function: timeLabel
+    Parameters: name, minutes
+    Return Value: str
+    Purpose: Returns an axis label for a time called name, in the unit being graphed.
+'''
+
+
+def timeLabel(name, minutes):
+    if minutes:
+        return name + ' (minutes)'
+    return name + ' (seconds)'
+
+
+'''
+    Function: fileName
+    Parameters: car
+    Return Value: str
+    Purpose: Returns carNum-TeamName, as exportCSV names a car's file, with anything that can't go in a file name
+             replaced.
+'''
+
+
+def fileName(car):
+    return re.sub(r'[^\w. -]', '_', str(car.CarNum) + '-' + str(car.TeamName)).strip() or str(car.ID)
+
+
+'''
+    Function: formatTime
+    Parameters: seconds (float or None)
+    Return Value: str
+    Purpose: Returns a time as saveCSV writes lap times, or nothing for None.
+'''
+
+
+def formatTime(seconds):
+    return '' if seconds is None else str(datetime.timedelta(seconds=seconds))
+
+
+'''
+    Function: tickLabels
+    Parameters: axes
+    Return Value: list of str
+    Purpose: Returns the labels of the y axis' ticks as they'd be drawn now.
+'''
+
+
+def tickLabels(axes):
+    return axes.yaxis.get_major_formatter().format_ticks(axes.yaxis.get_majorticklocs())
+
+
+'''
+    Function: lineFigure
+    Parameters: name, chart (Chart of one line), args
+    Return Value: Figure
+    Purpose: Returns a figure with chart drawn on it. The first figure of each chart is laid out and kept, later
+             charts are drawn by swapping in their line, axes and legend, and only laid out again when their tick
+             labels differ from the ones it was laid out for. Working out the layout takes longer than drawing.
+'''
+
+
+def lineFigure(name, chart, args):
+    key = (name, args.width, args.height, args.dpi)
+    if key not in figures:
+        figure, axes = drawFigure(chart, args.width, args.height, args.dpi)
+        figure.canvas.draw()
+        # laid out once here, not again on every draw
+        if hasattr(figure, 'set_layout_engine'):
+            figure.set_layout_engine('none')
+        else:
+            figure.set_tight_layout(False)
+        figures[key] = (figure, axes, tickLabels(axes))
+        return figure
+
+    figure, axes, laidOut = figures[key]
+    (x, y, label), = chart.series.values()
+    line = axes.lines[0]
+    line.set_data(x, y)
+    line.set_label(label)
+    left, right, bottom, top = chart.limits
+    axes.set_xlim(left, right)
+    axes.set_ylim(bottom, top)
+    axes.legend([line], [label])
+    labels = tickLabels(axes)
+    if labels != laidOut:
+        figure.tight_layout()
+        figures[key] = (figure, axes, labels)
+    return figure
+
+
+'''
+    Function: saveFigure
+    Parameters: figure, path (without an extension), args
+    Return Value: list of str
+    Purpose: Saves figure in each of the formats of args, returning the files written.
+'''
+
+
+def saveFigure(figure, path, args):
+    files = []
+    for fileFormat in args.formats:
+        options = {'pil_kwargs': {'compress_level': pngCompression}} if fileFormat == 'png' else {}
+        figure.savefig(path + '.' + fileFormat, format=fileFormat, dpi=args.dpi, **options)
+        files.append(path + '.' + fileFormat)
+    return files
+
+
+'''
+    Function: renderTeam
+    Parameters: task (from sessionTasks)
+    Return Value: dict
+    Purpose: Runs in a worker process, drawing the charts of a team into a directory of its own under teams and
+             returning its summary, with the lap times in seconds. A team that fails returns where it came from and
+             the error instead.
+'''
+
+
+def renderTeam(task):
+    source, value, carID, args = task
+    try:
+        car = loadCar(source, value, carID)
+        series = CarSeries(car.lapList.elapsedArray())
+        scale = 60 if args.minutes else 1
+        folder = os.path.join('teams', fileName(car))
+        os.makedirs(os.path.join(args.output, folder), exist_ok=True)
+        files = []
+        for name, title, timeName, build in teamCharts:
+            job = ChartJob(title, 'Lap', timeLabel(timeName, args.minutes))
+            job.series[car.ID] = (partial(build, series, scale), car.getTeam())
+            job.legend = True
+            job.width = args.width
+            job.height = args.height
+            chart = prepareChart(job)
+            if chart.limits is None:
+                # nothing to draw, no laps or none but the seed lap
+                continue
+            files += saveFigure(lineFigure(name, chart, args), os.path.join(args.output, folder, name), args)
+        average = float(series.validTimes.mean()) if len(series.validTimes) else None
+        return {'ID': car.ID, 'CarNum': car.CarNum, 'TeamName': car.TeamName, 'laps': len(series.validTimes),
+                'fastest': series.fastest(), 'slowest': series.slowest(), 'average': average,
+                'files': [os.path.relpath(path, args.output) for path in files]}
+    except Exception as e:
+        return {'source': value if source == 'file' else ','.join(value[:3]), 'error': str(e)}
+
+
+'''
+    Function: renderTeams
+    Parameters: tasks, workers
+    Return Value: list of dict
+    Purpose: Runs renderTeam on every task, in a pool of up to workers processes, returning the results in the
+             order they finished.
+'''
+
+
+def renderTeams(tasks, workers):
+    workers = min(workers, len(tasks))
+    if workers <= 1:
+        return [renderTeam(task) for task in tasks]
+    # spawned like the video processing pool, the workers start clean rather than copying this process
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(workers) as pool:
+        return list(pool.imap_unordered(renderTeam, tasks, max(1, len(tasks) // (workers * 4))))
+
+
+'''
+    Function: renderBars
+    Parameters: teams (list of summaries), args
+    Return Value: list of str
+    Purpose: Draws the bar charts of the fastest and slowest lap of every team that has one, widened to fit the
+             teams. Returns the files written.
+'''
+
+
+def renderBars(teams, args):
+    scale = 60 if args.minutes else 1
+    files = []
+    for name, title, lap in barCharts:
+        shown = [team for team in teams if team[lap] is not None]
+        if not shown:
+            continue
+        job = ChartJob(title, 'Teams', timeLabel('Time', args.minutes))
+        heights = [team[lap] / scale for team in shown]
+        labels = [team['TeamName'] for team in shown]
+        job.bars = lambda: (heights, labels)
+        job.legend = True if len(shown) <= legendLimit else None
+        job.width = max(args.width, barPixels * len(shown))
+        job.height = args.height
+        figure, axes = drawFigure(prepareChart(job), job.width, job.height, args.dpi)
+        files += saveFigure(figure, os.path.join(args.output, name), args)
+    return files
+
+
+'''
+    Function: writeSummary
+    Parameters: teams (list of summaries), path
+    Return Value: N/A
+    Purpose: Writes a row of every team's lap count, fastest, slowest and average lap, and its charts.
+'''
+
+
+def writeSummary(teams, path):
+    with open(path, 'w', newline='') as summaryFile:
+        writer = csv.writer(summaryFile)
+        writer.writerow(summaryHeader)
+        for team in teams:
+            writer.writerow([team['ID'], team['CarNum'], team['TeamName'], team['laps'], formatTime(team['fastest']),
+                             formatTime(team['slowest']), formatTime(team['average']), ';'.join(team['files'])])
+
+
+'''
+    Function: main
+    Parameters: argv (default = None for the command line's)
+    Return Value: int (exit status)
+    Purpose: Draws the report of a session, printing where it went and any teams that couldn't be drawn.
+'''
+
+
+def main(argv=None):
+    args = parseArguments(argv)
+    start = time.perf_counter()
+    tasks = sessionTasks(args.session, args)
+    os.makedirs(args.output, exist_ok=True)
+    results = renderTeams(tasks, args.workers)
+
+    failed = [result for result in results if 'error' in result]
+    teams = sorted([result for result in results if 'error' not in result], key=lambda team: team['ID'])
+    for result in failed:
+        print('Could not draw ' + str(result['source']) + ': ' + result['error'], file=sys.stderr)
+    files = renderBars(teams, args)
+    writeSummary(teams, os.path.join(args.output, 'summary.csv'))
+
+    charts = len(files) + sum(len(team['files']) for team in teams)
+    print('Drew ' + str(charts) + ' charts of ' + str(len(teams)) + ' teams into ' + args.output + ' in ' +
+          format(time.perf_counter() - start, '.1f') + ' s')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -16,7 +16,6 @@ from PyQt5.QtCore import Qt, QSize
 from SCTimeUtility.LeaderBoard import LeaderBoardUIPath
 from SCTimeUtility.LeaderBoard.LeaderBoardWidget import LeaderBoardWidget
 from SCTimeUtility.LeaderBoard.LeaderBoardModel import LeaderBoardModel
-from SCTimeUtility.LeaderBoard.LeaderBoardSortFilterProxyModel import LeaderBoardSortFilterProxyModel
 
 
 class LeaderBoard():
@@ -30,15 +29,13 @@ class LeaderBoard():
 
         self.initWidget()
         self.carStore = cs
-        self.boardModel = LeaderBoardSortFilterProxyModel(self.widget.tableView, self.sortableColumns)
-        self.boardModel.setSourceModel(LeaderBoardModel(self.widget.tableView, self.horzHeader, self.carStore))
-        self.boardModel.setSortRole(Qt.UserRole)
+        # the model keeps itself ranked as laps come in, the view only asks it to resort when a header is clicked
+        self.boardModel = LeaderBoardModel(self.widget.tableView, self.horzHeader, self.carStore)
         self.widget.tableView.setSortingEnabled(True)
-        self.boardModel.sourceModel().dataChanged.connect(self.sort)
         self.widget.tableView.horizontalHeader().sortIndicatorChanged.connect(self.sortIndicatorChangedEvent)
         self.widget.tableView.setModel(self.boardModel)
         self.widget.adjustHeaders(True)
-        self.widget.tableView.sortByColumn(3, Qt.AscendingOrder)
+        self.widget.tableView.sortByColumn(2, Qt.AscendingOrder)
 
     '''  
         Function: sort
@@ -48,9 +45,7 @@ class LeaderBoard():
     '''
 
     def sort(self):
-        oldSort = self.boardModel.sortColumn()
-        self.boardModel.invalidate()
-        self.widget.tableView.sortByColumn(oldSort, Qt.AscendingOrder)
+        self.boardModel.sort(self.boardModel.sortColumn(), self.boardModel.sortOrder())
 
     '''  
         Function: sortIndicatorChangedEvent
@@ -10,10 +10,11 @@
 from datetime import datetime, timedelta
 
 # Dependency Imports
-from PyQt5.QtCore import QAbstractTableModel, QVariant, Qt
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, QVariant, Qt
 
 # Package Imports
 from SCTimeUtility.Log.Log import getLog
+from SCTimeUtility.LeaderBoard.LeaderBoardRanking import LeaderBoardRanking, lapsKey, fastestLapKey
 
 
 class LeaderBoardModel(QAbstractTableModel):
@@ -24,6 +25,13 @@ class LeaderBoardModel(QAbstractTableModel):
         self.defaultRows = 10
         self.header = headerData
         self.carStore = storage
+        self.insertingRows = False
+        # standing keys of the sortable columns, laps completed and fastest lap
+        self.rankingKeys = {2: lapsKey, 3: fastestLapKey}
+        self.sortColumnIndex = 2
+        self.order = Qt.AscendingOrder
+        self.ranking = LeaderBoardRanking(lapsKey)
+        self.ranking.rebuild(self.carStore.storageList)
         self.connectActions()
 
     '''  
@@ -49,28 +57,130 @@ class LeaderBoardModel(QAbstractTableModel):
         return c.getFastestLap()
 
     '''  
-        Function: storageModifiedEvent
-        Parameters: self, col, row
+        Function: connectActions
+        Parameters: self
         Return Value: N/A
-        Purpose: Invoked when data has been modified and provides the location within the leaderboard in where data was
-                 actually changed.
+        Purpose: connects the necessary signals for getting updates of data.
     '''
 
-    def storageModifiedEvent(self, col, row):
-        leftChangeIndex = self.index(col, 0)
-        rightChangeIndex = self.index(col, self.columnCount())
-        self.dataChanged.emit(leftChangeIndex, leftChangeIndex)
-        self.headerDataChanged.emit(Qt.Vertical, row, row)
+    def connectActions(self):
+        self.carStore.dataRangeModified.connect(self.storageRangeModifiedEvent)
+        self.carStore.carsAboutToBeInserted.connect(self.carsAboutToBeInsertedEvent)
+        self.carStore.carsInserted.connect(self.carsInsertedEvent)
 
     '''  
-        Function: connectActions
-        Parameters: self
+        Function: storageRangeModifiedEvent
+        Parameters: self, firstID, lastID, firstLap, lastLap
         Return Value: N/A
-        Purpose: connects the necessary signals for getting updates of data.
+        Purpose: Moves every car changed since CarStorage last flushed its updates to its new standing and refreshes
+                 the rows that were touched with a single dataChanged.
     '''
 
-    def connectActions(self):
-        self.carStore.dataModified.connect(self.storageModifiedEvent)
+    def storageRangeModifiedEvent(self, firstID, lastID, firstLap, lastLap):
+        firstRow = None
+        lastRow = None
+        for ID in range(firstID, lastID + 1):
+            row = self.repositionCar(ID)
+            if row is not None:
+                firstRow = row if firstRow is None else min(firstRow, row)
+                lastRow = row if lastRow is None else max(lastRow, row)
+        if firstRow is not None:
+            self.dataChanged.emit(self.index(firstRow, 0), self.index(lastRow, self.columnCount() - 1))
+            self.headerDataChanged.emit(Qt.Vertical, firstRow, lastRow)
+
+    '''  
+        Function: repositionCar
+        Parameters: self, ID
+        Return Value: int (row the car is now at) or None
+        Purpose: Moves a single car to its new standing, telling the view with beginMoveRows/endMoveRows, and
+                 returns its row so it's refreshed even if its standing didn't change, as when its team name or car
+                 number is edited. None if the car isn't on the board.
+    '''
+
+    def repositionCar(self, ID):
+        car = self.carStore.getCarByID(ID)
+        if not car or ID not in self.ranking.keyByID:
+            return None
+        move = self.ranking.findMove(car)
+        if move is None:
+            return self.ranking.rowOf(ID)
+        oldRow, newRow = move
+        if oldRow != newRow:
+            # destination is the row the car is placed before, counted before it is taken out
+            destination = newRow + 1 if newRow > oldRow else newRow
+            self.beginMoveRows(QModelIndex(), oldRow, oldRow, QModelIndex(), destination)
+            self.ranking.update(car)
+            self.endMoveRows()
+        else:
+            self.ranking.update(car)
+        return newRow
+
+    '''  
+        Function: carsAboutToBeInsertedEvent
+        Parameters: self, first, last
+        Return Value: N/A
+        Purpose: Invoked before CarStorage adds the cars with IDs first through last, opens a single row insertion
+                 for the whole batch if the leaderboard has to grow to fit them.
+    '''
+
+    def carsAboutToBeInsertedEvent(self, first, last):
+        oldCount = self.rowCount(QModelIndex())
+        newCount = max(last + 1, self.defaultRows)
+        self.insertingRows = newCount > oldCount
+        if self.insertingRows:
+            self.beginInsertRows(QModelIndex(), oldCount, newCount - 1)
+
+    '''  
+        Function: carsInsertedEvent
+        Parameters: self, first, last
+        Return Value: N/A
+        Purpose: Invoked once CarStorage has added the cars with IDs first through last, closes the row insertion
+                 and ranks the new cars. New cars haven't completed a lap so they normally rank at the bottom,
+                 otherwise the whole layout is refreshed.
+    '''
+
+    def carsInsertedEvent(self, first, last):
+        if self.insertingRows:
+            self.endInsertRows()
+            self.insertingRows = False
+        oldCount = len(self.ranking)
+        newCars = [self.carStore.getCarByID(ID) for ID in range(first, last + 1)]
+        if self.ranking.descending:
+            self.layoutAboutToBeChanged.emit()
+            for car in newCars:
+                self.ranking.insert(car)
+            self.layoutChanged.emit()
+            return
+        rows = [self.ranking.insert(car) for car in newCars]
+        if min(rows) < oldCount:
+            self.layoutAboutToBeChanged.emit()
+            self.layoutChanged.emit()
+        self.dataChanged.emit(self.index(oldCount, 0), self.index(len(self.ranking) - 1, self.columnCount() - 1))
+        self.headerDataChanged.emit(Qt.Vertical, oldCount, len(self.ranking) - 1)
+
+    '''  
+        Function: sort
+        Parameters: self, column, order
+        Return Value: N/A
+        Purpose: Overloaded PyQt function invoked by the view when a header is clicked, ranks every car again by
+                 the clicked column if it is sortable. This is the only time the whole board is resorted.
+    '''
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if column not in self.rankingKeys:
+            return
+        self.layoutAboutToBeChanged.emit()
+        self.sortColumnIndex = column
+        self.order = order
+        self.ranking.rebuild(self.carStore.storageList, self.rankingKeys[column], order == Qt.DescendingOrder)
+        self.layoutChanged.emit()
+        self.headerDataChanged.emit(Qt.Vertical, 0, self.rowCount(QModelIndex()) - 1)
+
+    def sortColumn(self):
+        return self.sortColumnIndex
+
+    def sortOrder(self):
+        return self.order
 
     '''  
         Function: rowCount
@@ -102,13 +212,13 @@ class LeaderBoardModel(QAbstractTableModel):
 
     def data(self, item, role):
         if role == Qt.DisplayRole:
-            if (item.column() < self.defaultColumns) and item.row() < len(self.carStore.storageList):
-                return str(self.getDisplayItemAt(item.row(), item.column()))
+            if (item.column() < self.defaultColumns) and item.row() < len(self.ranking):
+                return str(self.getDisplayItemAt(self.ranking.IDAt(item.row()), item.column()))
             else:
                 return QVariant()
         elif role == Qt.UserRole:
-            if (item.column() < self.defaultColumns) and item.row() < len(self.carStore.storageList):
-                return self.getSortItemAt(item.row(), item.column())
+            if (item.column() < self.defaultColumns) and item.row() < len(self.ranking):
+                return self.getSortItemAt(self.ranking.IDAt(item.row()), item.column())
             else:
                 return QVariant()
         else:
@@ -129,6 +239,10 @@ class LeaderBoardModel(QAbstractTableModel):
                     return self.header[section]
                 else:
                     return None
+            elif self.order == Qt.AscendingOrder:
+                return self.headerData(section, orientation, Qt.UserRole)
+            else:
+                return self.headerData(section, orientation, Qt.UserRole + 1)
         elif role == Qt.UserRole:
             if orientation == Qt.Vertical:
                 if section < len(self.carStore.storageList):
@@ -146,7 +260,7 @@ class LeaderBoardModel(QAbstractTableModel):
         Function: getDisplayItemAt
         Parameters: self, index, subindex
         Return Value: None/int/str
-        Purpose: Returns the item to display of the subindex, in the index of carStorage.
+        Purpose: Returns the item to display of the subindex, for the car at index (its ID) in carStorage.
     '''
 
     def getDisplayItemAt(self, index, subIndex):
@@ -169,7 +283,7 @@ class LeaderBoardModel(QAbstractTableModel):
         Function: getSortItemAt
         Parameters: self, index, subindex
         Return Value: None or int
-        Purpose: Returns the sorted item under the subindex at the specified index within Car Storage.
+        Purpose: Returns the sorted item under the subindex for the car at index (its ID) within Car Storage.
     '''
 
     def getSortItemAt(self, index, subIndex):
@@ -0,0 +1,171 @@
+"""
+
+    Module: LeaderBoardRanking.py
+    Purpose: Keeps the cars of the leaderboard in standing order as a sorted list of ranking keys, so a car that
+             records a lap is moved to its new position with a binary search instead of resorting every car.
+    Depends On: bisect
+
+"""
+
+import bisect
+
+# used in place of a fastest lap for cars that haven't completed a valid lap, ranking them last
+noLap = float('inf')
+
+'''
+    Function: lapsCompleted
+    Parameters: car
+    Return Value: int
+    Purpose: Returns the amount of laps a car has completed, the seed lap doesn't count.
+'''
+
+
+def lapsCompleted(car):
+    return max(car.getLapCount() - 1, 0)
+
+
+'''
+    Function: fastestLap
+    Parameters: car
+    Return Value: int microseconds or noLap
+    Purpose: Returns the fastest valid lap of a car from its running lap statistics.
+'''
+
+
+def fastestLap(car):
+    fastest = car.lapList.statistics.fastest
+    return noLap if fastest is None else fastest
+
+
+'''
+    Function: lapsKey
+    Parameters: car
+    Return Value: tuple
+    Purpose: Ranking key for race standing, most laps completed first and fastest lap breaking ties.
+'''
+
+
+def lapsKey(car):
+    return (-lapsCompleted(car), fastestLap(car), car.ID)
+
+
+'''
+    Function: fastestLapKey
+    Parameters: car
+    Return Value: tuple
+    Purpose: Ranking key for qualifying style standing, fastest lap first and laps completed breaking ties.
+'''
+
+
+def fastestLapKey(car):
+    return (fastestLap(car), -lapsCompleted(car), car.ID)
+
+
+class LeaderBoardRanking():
+
+    def __init__(self, keyFunction=lapsKey, descending=False):
+        self.keyFunction = keyFunction
+        self.descending = descending
+        # sorted ranking keys, the car ID is the last item of each key
+        self.keys = []
+        self.keyByID = {}
+
+    '''
+        Function: rebuild
+        Parameters: self, cars, keyFunction (optional), descending (optional)
+        Return Value: N/A
+        Purpose: Ranks every car from scratch, optionally with a different key or order, O(n log n).
+    '''
+
+    def rebuild(self, cars, keyFunction=None, descending=None):
+        if keyFunction is not None:
+            self.keyFunction = keyFunction
+        if descending is not None:
+            self.descending = descending
+        self.keyByID = {car.ID: self.keyFunction(car) for car in cars}
+        self.keys = sorted(self.keyByID.values())
+
+    '''
+        Function: toRow
+        Parameters: self, position
+        Return Value: int
+        Purpose: Converts a position in the sorted keys to a row of the leaderboard, which is reversed when ranking
+                 in descending order. The conversion is its own inverse.
+    '''
+
+    def toRow(self, position):
+        return len(self.keys) - 1 - position if self.descending else position
+
+    '''
+        Function: insert
+        Parameters: self, car
+        Return Value: int (row the car was ranked at)
+        Purpose: Adds a car to the ranking.
+    '''
+
+    def insert(self, car):
+        key = self.keyFunction(car)
+        self.keyByID[car.ID] = key
+        position = bisect.bisect_left(self.keys, key)
+        self.keys.insert(position, key)
+        return self.toRow(position)
+
+    '''
+        Function: findMove
+        Parameters: self, car
+        Return Value: (old row, new row) or None
+        Purpose: Works out where a car that has changed would move to without changing the ranking, None if its
+                 key hasn't changed.
+    '''
+
+    def findMove(self, car):
+        oldKey = self.keyByID[car.ID]
+        newKey = self.keyFunction(car)
+        if newKey == oldKey:
+            return None
+        oldPosition = bisect.bisect_left(self.keys, oldKey)
+        newPosition = bisect.bisect_left(self.keys, newKey)
+        # the car's own key is taken out before it is put back in
+        if newPosition > oldPosition:
+            newPosition -= 1
+        return self.toRow(oldPosition), self.toRow(newPosition)
+
+    '''
+        Function: update
+        Parameters: self, car
+        Return Value: (old row, new row) or None
+        Purpose: Moves a car that has changed to its new place in the ranking, O(log n) to find both places.
+    '''
+
+    def update(self, car):
+        move = self.findMove(car)
+        if move is not None:
+            oldKey = self.keyByID[car.ID]
+            del self.keys[bisect.bisect_left(self.keys, oldKey)]
+            newKey = self.keyFunction(car)
+            self.keyByID[car.ID] = newKey
+            bisect.insort(self.keys, newKey)
+        return move
+
+    '''
+        Function: rowOf
+        Parameters: self, ID
+        Return Value: int
+        Purpose: Returns the row the car with the given ID is ranked at.
+    '''
+
+    def rowOf(self, ID):
+        return self.toRow(bisect.bisect_left(self.keys, self.keyByID[ID]))
+
+    '''
+        Function: IDAt
+        Parameters: self, row
+        Return Value: int
+        Purpose: Returns the ID of the car ranked at the given row.
+    '''
+
+    def IDAt(self, row):
+        return self.keys[self.toRow(row)][-1]
+
+    def __len__(self):
+        return len(self.keys)